@@ -35,6 +35,23 @@ DEFAULT_BATCH_SIZE = 2
 MAX_WORKERS = 3
 DELAY_MIN = 1
 DELAY_MAX = 3
+MAX_COMPANIES = DEFAULT_BATCH_SIZE  # None to crawl until a budget runs out
+
+# Scheduler Configuration
+PRIORITY_STRATEGY = "rank_org"  # "rank_org" or "staleness"
+LOW_PRIORITY_RANK = 1000  # companies ranked below this are first to be degraded
+
+# Timeouts (seconds)
+COMPANY_TIMEOUT = 300
+SCRAPE_TIMEOUT = 90
+ANALYSIS_TIMEOUT = 120
+
+# Budget caps (None disables a cap)
+MAX_SCRAPEOWL_CALLS = 100
+MAX_OPENAI_TOKENS = 200000
+ANALYSIS_COMPLETION_TOKENS = 1500  # expected completion size, reserved before each GPT request
+MAX_CRAWL_SECONDS = 3600
+BUDGET_LOW_THRESHOLD = 0.2  # fraction of a budget left before degrading
 
 # Field configurations
 COMPANY_FIELDS = [
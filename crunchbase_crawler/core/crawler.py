@@ -1,11 +1,15 @@
 import requests
 import os
+import time
 from crunchbase_crawler.utils.logger import logger
 from crunchbase_crawler.config.settings import (
     BASE_API_URL, COMPANY_FIELDS, 
     DEFAULT_BATCH_SIZE,
     SCRAPEOWL_API_KEY,
-    SCRAPEOWL_API_URL
+    SCRAPEOWL_API_URL,
+    SCRAPE_TIMEOUT,
+    ANALYSIS_TIMEOUT,
+    ANALYSIS_COMPLETION_TOKENS
 )
 from bs4 import BeautifulSoup
 from openai import OpenAI
@@ -21,14 +25,14 @@ class CrunchbaseCrawler:
             api_key=openai_api_key
         )
         
-    def get_organizations(self, after_id=None, limit=DEFAULT_BATCH_SIZE):
+    def get_organizations(self, after_id=None, limit=DEFAULT_BATCH_SIZE, order=None):
         """Fetch organizations from Crunchbase API"""
         try:
             logger.info(f"📊 Fetching first {limit} organizations...")
             
             payload = {
                 "field_ids": COMPANY_FIELDS,
-                "order": [{"field_id": "rank_org", "sort": "asc"}],
+                "order": order or [{"field_id": "rank_org", "sort": "asc"}],
                 "limit": limit,
                 "after_id": after_id
             }
@@ -109,46 +113,83 @@ class CrunchbaseCrawler:
             logger.error(f"❌ API request failed: {str(e)}")
             return None
 
-    def process_company(self, entity, uuid):
+    def process_company(self, entity, uuid, budget=None, deadline=None, low_priority=False):
         """Process company data from API response"""
+        company_data = self.crawl_company(entity, uuid, budget=budget, deadline=deadline, low_priority=low_priority)
+        if company_data:
+            self.companies_data.append(company_data)
+        return company_data
+
+    def crawl_company(self, entity, uuid, budget=None, deadline=None, low_priority=False):
+        """Build and enrich company data without touching shared crawler state"""
         try:
             logger.info(f"🔍 Processing company: {uuid}")
-            properties= entity.get('properties', {})
-
-            company_data = {
-                'uuid': uuid,
-                'rank_org': properties.get('rank_org'),
-                'name': properties.get('name'),
-                'description': properties.get('short_description'),
-                'website': properties.get('website_url'),
-                'created_at': properties.get('created_at'),
-                'updated_at': properties.get('updated_at'),
-                'entity_def_id': properties.get('entity_def_id'),
-                'permalink': properties.get('permalink'),
-                'image_id': properties.get('image_id'),
-                'image_url': properties.get('image_url'),
-                'facet_ids': properties.get('facet_ids', []),
-                'locations': self._extract_locations(properties),
-                'social_media': self._extract_social_media(properties)
-            }
+            properties = entity.get('properties', {})
+            company_data = self.build_company_data(entity, uuid)
 
             if properties.get('website_url'):
-                website_content = self.scrape_page(properties['website_url'])
+                website_content = None
+                scrape_timeout = self._stage_timeout(SCRAPE_TIMEOUT, deadline)
+                if scrape_timeout is None:
+                    logger.warning(f"⏰ Skipping scrape for {company_data['name']}, company deadline passed")
+                elif budget and not budget.acquire_scrape(low_priority):
+                    logger.warning(f"⏭️ Skipping scrape for {company_data['name']}, {budget.limiting_budget('scrape')} budget low")
+                else:
+                    website_content = self.scrape_page(properties['website_url'], timeout=scrape_timeout)
                 company_data['website_content'] = website_content
                 if website_content and self.openai_client:
-                    logger.info(f"💾 Analyzing website content for: {company_data['name']}")
-                    company_data['gpt_analysis'] = self.analyze_website_with_gpt(website_content)
-                    logger.info(f"💾 Saved GPT analysis for: {company_data['name']}")
+                    if budget and not budget.allow_analysis(low_priority):
+                        logger.warning(f"⏭️ Skipping GPT analysis for {company_data['name']}, {budget.limiting_budget('openai')} budget low")
+                    else:
+                        logger.info(f"💾 Analyzing website content for: {company_data['name']}")
+                        company_data['gpt_analysis'] = self.analyze_website_with_gpt(
+                            website_content, budget=budget, deadline=deadline, low_priority=low_priority
+                        )
+                        logger.info(f"💾 Saved GPT analysis for: {company_data['name']}")
                 else:
                     logger.warning(f"❌ No website content or GPT client available for: {company_data['name']}")
 
-            self.companies_data.append(company_data)
+            if deadline is not None and time.monotonic() > deadline and company_data.get('website_content'):
+                logger.warning(f"⏰ {uuid} finished after its deadline, keeping Crunchbase data only")
+                company_data['website_content'] = None
+                company_data.pop('gpt_analysis', None)
+
             return company_data
 
         except Exception as e:
             logger.error(f"❌ Failed to process company: {str(e)}")
             return None
 
+    def build_company_data(self, entity, uuid):
+        """Extract the Crunchbase fields of a company, without website enrichment"""
+        properties = entity.get('properties', {})
+        return {
+            'uuid': uuid,
+            'rank_org': properties.get('rank_org'),
+            'name': properties.get('name'),
+            'description': properties.get('short_description'),
+            'website': properties.get('website_url'),
+            'created_at': properties.get('created_at'),
+            'updated_at': properties.get('updated_at'),
+            'entity_def_id': properties.get('entity_def_id'),
+            'permalink': properties.get('permalink'),
+            'image_id': properties.get('image_id'),
+            'image_url': properties.get('image_url'),
+            'facet_ids': properties.get('facet_ids', []),
+            'locations': self._extract_locations(properties),
+            'social_media': self._extract_social_media(properties)
+        }
+
+    @staticmethod
+    def _stage_timeout(stage_timeout, deadline):
+        """Clamp a stage timeout to the time left before the company deadline, None once it has passed"""
+        if deadline is None:
+            return stage_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        return min(stage_timeout, remaining)
+
     def _extract_locations(self, properties):
         """Extract location data from properties"""
         locations = []
@@ -168,7 +209,7 @@ class CrunchbaseCrawler:
             'twitter': properties.get('twitter', {}).get('value')
         }
 
-    def scrape_page(self, url: str) -> Optional[str]:
+    def scrape_page(self, url: str, timeout: float = SCRAPE_TIMEOUT) -> Optional[str]:
         """Scrape a webpage using ScrapeOwl API and extract relevant content"""
         try:
             logger.info(f"🔍 Scraping page: {url}")
@@ -184,7 +225,8 @@ class CrunchbaseCrawler:
                 headers={
                     "Content-Type": "application/json"
                 },
-                json=payload
+                json=payload,
+                timeout=timeout
             )
 
             if response.status_code == 200:
@@ -223,7 +265,7 @@ class CrunchbaseCrawler:
             logger.error(f"Error during scraping: {str(e)}")
             return None
 
-    def analyze_website_with_gpt(self, website_content):
+    def analyze_website_with_gpt(self, website_content, budget=None, deadline=None, low_priority=False):
         """Analyze website content using GPT"""
         try:
             if not self.openai_client or not website_content:
@@ -234,39 +276,61 @@ class CrunchbaseCrawler:
 
             summaries = []
             for chunk in chunks:
-                response = self.openai_client.chat.completions.create(
+                messages = [
+                    {
+                        "role": "system", 
+                        "content": (
+                            "You are an expert business analyst. Analyze the provided website content "
+                            "and generate a structured summary with these key sections:\n"
+                            "1. **Company Overview** (Name, Industry, Founding Year, Location)\n"
+                            "2. **Products & Services** (Main offerings and their features)\n"
+                            "3. **Target Audience** (Who they serve, market segmentation)\n"
+                            "4. **Unique Value Proposition** (What makes them different from competitors)\n"
+                            "5. **Business Model** (How they generate revenue, pricing strategy)\n"
+                            "6. **Key Achievements** (Awards, funding rounds, major partnerships)\n"
+                            "7. **Technology & Innovation** (Tech stack, patents, innovation focus)\n"
+                            "8. **Customer Testimonials & Case Studies** (If available)\n"
+                            "9. **Recent News & Blog Highlights** (If mentioned on the website)\n"
+                            "10. **Any Additional Insights or Observations from the Website**\n"
+                        )
+                    },
+                    {
+                        "role": "user", 
+                        "content": f"Analyze this website content and provide a detailed structured summary of the company:\n\n{chunk}"
+                    }
+                ]
+
+                timeout = self._stage_timeout(ANALYSIS_TIMEOUT, deadline)
+                if timeout is None:
+                    logger.warning(f"⏰ Company deadline passed, stopping analysis after {len(summaries)} chunks")
+                    break
+
+                estimate = self._estimate_tokens(messages)
+                if budget and not budget.reserve_tokens(estimate, low_priority):
+                    logger.warning(f"⏭️ {budget.limiting_budget('openai')} budget low, stopping analysis after {len(summaries)} chunks")
+                    break
+
+                # A failed request keeps its reservation, since it may still have been billed
+                # No retries, so the timeout bounds the whole stage rather than each attempt
+                response = self.openai_client.with_options(max_retries=0, timeout=timeout).chat.completions.create(
                     model="gpt-4",
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": (
-                                "You are an expert business analyst. Analyze the provided website content "
-                                "and generate a structured summary with these key sections:\n"
-                                "1. **Company Overview** (Name, Industry, Founding Year, Location)\n"
-                                "2. **Products & Services** (Main offerings and their features)\n"
-                                "3. **Target Audience** (Who they serve, market segmentation)\n"
-                                "4. **Unique Value Proposition** (What makes them different from competitors)\n"
-                                "5. **Business Model** (How they generate revenue, pricing strategy)\n"
-                                "6. **Key Achievements** (Awards, funding rounds, major partnerships)\n"
-                                "7. **Technology & Innovation** (Tech stack, patents, innovation focus)\n"
-                                "8. **Customer Testimonials & Case Studies** (If available)\n"
-                                "9. **Recent News & Blog Highlights** (If mentioned on the website)\n"
-                                "10. **Any Additional Insights or Observations from the Website**\n"
-                            )
-                        },
-                        {
-                            "role": "user", 
-                            "content": f"Analyze this website content and provide a detailed structured summary of the company:\n\n{chunk}"
-                        }
-                    ]
+                    messages=messages
                 )
+                if budget:
+                    budget.settle_tokens(estimate, response.usage.total_tokens if response.usage else estimate)
                 summaries.append(response.choices[0].message.content)
 
-            return "\n\n".join(summaries)
+            return "\n\n".join(summaries) if summaries else None
         except Exception as e:
             logger.error(f"❌ GPT analysis failed: {str(e)}")
             return None
 
+    @staticmethod
+    def _estimate_tokens(messages):
+        """Rough upper estimate of a chat request's token cost (~4 characters per token)"""
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        return prompt_tokens + ANALYSIS_COMPLETION_TOKENS
+
     def save_to_sql(self):
         """Generate SQL file from companies data"""
         try:
@@ -0,0 +1,259 @@
+import time
+import random
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from crunchbase_crawler.utils.logger import logger
+from crunchbase_crawler.config.settings import (
+    DEFAULT_BATCH_SIZE, MAX_WORKERS, DELAY_MIN, DELAY_MAX,
+    MAX_COMPANIES, PRIORITY_STRATEGY, LOW_PRIORITY_RANK, COMPANY_TIMEOUT,
+    MAX_SCRAPEOWL_CALLS, MAX_OPENAI_TOKENS, MAX_CRAWL_SECONDS,
+    BUDGET_LOW_THRESHOLD
+)
+
+# Search API sort orders for each priority strategy
+SORT_ORDERS = {
+    'rank_org': [{"field_id": "rank_org", "sort": "asc"}],
+    'staleness': [{"field_id": "updated_at", "sort": "asc"}, {"field_id": "rank_org", "sort": "asc"}],
+}
+
+# Seconds between checks for finished or timed-out companies
+POLL_INTERVAL = 1
+
+class CrawlBudget:
+    """Thread-safe budget for ScrapeOwl calls, OpenAI tokens and wall-clock time"""
+
+    def __init__(self, max_scrape_calls=MAX_SCRAPEOWL_CALLS, max_openai_tokens=MAX_OPENAI_TOKENS,
+                 max_seconds=MAX_CRAWL_SECONDS, low_threshold=BUDGET_LOW_THRESHOLD):
+        self.max_scrape_calls = max_scrape_calls
+        self.max_openai_tokens = max_openai_tokens
+        self.max_seconds = max_seconds
+        self.low_threshold = low_threshold
+        self.scrape_calls = 0
+        self.openai_tokens = 0
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _remaining_ratio(used, cap):
+        if cap is None:
+            return 1.0
+        if cap <= 0:
+            return 0.0
+        return max(cap - used, 0) / cap
+
+    def _time_ratio(self):
+        return self._remaining_ratio(time.monotonic() - self.started_at, self.max_seconds)
+
+    def _resource_ratio(self, resource):
+        if resource == 'scrape':
+            return self._remaining_ratio(self.scrape_calls, self.max_scrape_calls)
+        return self._remaining_ratio(self.openai_tokens, self.max_openai_tokens)
+
+    def _allows(self, resource, low_priority):
+        ratio = min(self._resource_ratio(resource), self._time_ratio())
+        return ratio > 0 and not (low_priority and ratio < self.low_threshold)
+
+    def time_remaining(self):
+        """Seconds left in the wall-clock budget, or None when uncapped"""
+        if self.max_seconds is None:
+            return None
+        return max(self.max_seconds - (time.monotonic() - self.started_at), 0)
+
+    def time_exhausted(self):
+        return self._time_ratio() <= 0
+
+    def limiting_budget(self, resource):
+        """Name the budget closest to running out for 'scrape' or 'openai' work"""
+        with self._lock:
+            if self._time_ratio() < self._resource_ratio(resource):
+                return 'wall-clock time'
+        return 'ScrapeOwl calls' if resource == 'scrape' else 'OpenAI tokens'
+
+    def acquire_scrape(self, low_priority=False):
+        """Reserve one ScrapeOwl call, returning False when the budget does not allow it"""
+        with self._lock:
+            if not self._allows('scrape', low_priority):
+                return False
+            self.scrape_calls += 1
+            return True
+
+    def allow_analysis(self, low_priority=False):
+        """Check whether GPT analysis is still within budget, without reserving anything"""
+        with self._lock:
+            return self._allows('openai', low_priority)
+
+    def reserve_tokens(self, tokens, low_priority=False):
+        """Reserve an estimated token cost, returning False when it does not fit the budget"""
+        with self._lock:
+            if not self._allows('openai', low_priority):
+                return False
+            if self.max_openai_tokens is not None and self.openai_tokens + tokens > self.max_openai_tokens:
+                return False
+            self.openai_tokens += tokens
+            return True
+
+    def settle_tokens(self, reserved, actual):
+        """Replace a reservation with the tokens the request actually used"""
+        with self._lock:
+            self.openai_tokens += (actual or 0) - reserved
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started_at
+        return (
+            f"ScrapeOwl calls: {self.scrape_calls}/{self.max_scrape_calls or '∞'}, "
+            f"OpenAI tokens: {self.openai_tokens}/{self.max_openai_tokens or '∞'}, "
+            f"elapsed: {elapsed:.0f}s/{self.max_seconds or '∞'}s"
+        )
+
+class CrawlScheduler:
+    """Process Crunchbase pages in priority order with per-company deadlines and budget caps"""
+
+    def __init__(self, crawler, budget=None, strategy=PRIORITY_STRATEGY,
+                 max_companies=MAX_COMPANIES, company_timeout=COMPANY_TIMEOUT):
+        if strategy not in SORT_ORDERS:
+            raise ValueError(f"❌ Unknown priority strategy: {strategy}")
+        self.crawler = crawler
+        self.budget = budget or CrawlBudget()
+        self.strategy = strategy
+        self.max_companies = max_companies
+        self.company_timeout = company_timeout
+
+    @staticmethod
+    def _rank(entity):
+        rank = entity.get('properties', {}).get('rank_org')
+        return rank if rank is not None else float('inf')
+
+    @staticmethod
+    def _updated_at(entity):
+        value = entity.get('properties', {}).get('updated_at')
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except (AttributeError, ValueError):
+            # Never-updated records are treated as the most stale
+            return float('-inf')
+
+    def priority(self, entity):
+        """Sort key for an entity, lowest value is processed first"""
+        if self.strategy == 'staleness':
+            return (self._updated_at(entity), self._rank(entity))
+        return (self._rank(entity),)
+
+    def is_low_priority(self, entity):
+        return self._rank(entity) > LOW_PRIORITY_RANK
+
+    def run(self):
+        """Crawl pages until the company limit, the last page or a budget is reached"""
+        page_number = 1
+        total_processed = 0
+        order = SORT_ORDERS[self.strategy]
+        organizations = self.crawler.get_organizations(limit=DEFAULT_BATCH_SIZE, order=order)
+
+        # One pool for the whole crawl, so abandoned workers keep counting against MAX_WORKERS
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            while organizations:
+                if self.budget.time_exhausted():
+                    logger.warning("⏰ Wall-clock budget exhausted, stopping crawl")
+                    break
+
+                limit = None
+                if self.max_companies is not None:
+                    limit = self.max_companies - total_processed
+
+                logger.info(f"📑 Processing page {page_number} with {len(organizations)} organizations")
+                total_processed += self.process_page(executor, organizations, limit)
+
+                if self.max_companies is not None and total_processed >= self.max_companies:
+                    logger.info(f"🎯 Reached requested limit of {self.max_companies} companies")
+                    break
+
+                if len(organizations) == DEFAULT_BATCH_SIZE:
+                    last_uuid = organizations[-1]['uuid']
+                    logger.info(f"🔄 Fetching next page after UUID: {last_uuid}")
+                    time.sleep(random.uniform(DELAY_MIN, DELAY_MAX))
+                    organizations = self.crawler.get_organizations(
+                        after_id=last_uuid, limit=DEFAULT_BATCH_SIZE, order=order
+                    )
+                    page_number += 1
+                else:
+                    logger.info("🏁 No more organizations to process")
+                    break
+        finally:
+            executor.shutdown(wait=False)
+
+        logger.info(f"📊 Budget usage - {self.budget.summary()}")
+        logger.info(f"🎉 Crawling complete! Total companies processed: {total_processed}")
+        return total_processed
+
+    def process_page(self, executor, organizations, limit=None):
+        """Process one page of entities, returning how many companies were attempted"""
+        # The API already returns pages in priority order, this only breaks ties
+        scheduled = sorted(organizations, key=self.priority)
+        if limit is not None:
+            scheduled = scheduled[:limit]
+
+        # Deadlines start at submission, so time queued behind hung workers counts too
+        futures = {}
+        for entity in scheduled:
+            deadline = time.monotonic() + self.company_timeout
+            futures[executor.submit(self._run_company, entity, deadline)] = (entity, deadline)
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._collect(future, futures[future][0])
+
+            now = time.monotonic()
+            for future in list(pending):
+                entity, deadline = futures[future]
+                if now > deadline:
+                    logger.warning(f"⏰ Company timed out, keeping Crunchbase data only: {entity['uuid']}")
+                    self._give_up(future, entity)
+                    pending.discard(future)
+
+            if pending and self.budget.time_exhausted():
+                logger.warning("⏰ Wall-clock budget exhausted, abandoning remaining companies")
+                for future in pending:
+                    self._give_up(future, futures[future][0])
+                break
+
+        return len(scheduled)
+
+    def _collect(self, future, entity):
+        """Record a finished company, falling back to its Crunchbase data"""
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"❌ Error processing company: {str(e)}")
+            result = None
+
+        if result:
+            logger.info(f"✅ Processed: {result['name']}")
+        else:
+            result = self.crawler.build_company_data(entity, entity['uuid'])
+        self.crawler.companies_data.append(result)
+
+    def _give_up(self, future, entity):
+        """Stop waiting for a company, keeping its result if it just finished"""
+        if future.done() and not future.cancelled():
+            self._collect(future, entity)
+            return
+
+        # Queued companies are cancelled; running workers keep going but are never collected
+        future.cancel()
+        self.crawler.companies_data.append(self.crawler.build_company_data(entity, entity['uuid']))
+
+    def _run_company(self, entity, deadline):
+        uuid = entity['uuid']
+        if self.budget.time_exhausted():
+            logger.warning(f"⏭️ Skipping {uuid}, wall-clock budget exhausted")
+            return None
+
+        return self.crawler.crawl_company(
+            entity, uuid,
+            budget=self.budget,
+            deadline=deadline,
+            low_priority=self.is_low_priority(entity)
+        )
@@ -1,55 +1,16 @@
-from concurrent.futures import ThreadPoolExecutor
-import time
-import random
 import os
 from crunchbase_crawler.core.crawler import CrunchbaseCrawler
 from crunchbase_crawler.core.data_processor import DataProcessor
+from crunchbase_crawler.core.scheduler import CrawlScheduler
 from crunchbase_crawler.utils.file_handler import FileHandler
 from crunchbase_crawler.utils.logger import logger
 from crunchbase_crawler.config.settings import (
-    CRUNCHBASE_API_KEY, OPENAI_API_KEY, MAX_WORKERS, 
-    DELAY_MIN, DELAY_MAX, DEFAULT_BATCH_SIZE
+    CRUNCHBASE_API_KEY, OPENAI_API_KEY, DEFAULT_BATCH_SIZE
 )
 
 def process_api_data(crawler):
     """Process data by fetching from Crunchbase API"""
-    page_number = 1
-    total_processed = 0
-    organizations = crawler.get_organizations(limit=DEFAULT_BATCH_SIZE)
-    
-    while organizations:
-        logger.info(f"📑 Processing page {page_number} with {len(organizations)} organizations")
-        
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [
-                executor.submit(crawler.process_company, entity, entity['uuid']) 
-                for entity in organizations
-            ]
-            
-            for future in futures:
-                try:
-                    result = future.result()
-                    total_processed += 1
-                    if result:
-                        logger.info(f"✅ Processed: {result['name']}")
-                except Exception as e:
-                    logger.error(f"❌ Error processing company: {str(e)}")
-        
-        if total_processed >= DEFAULT_BATCH_SIZE:
-            logger.info(f"🎯 Reached requested limit of {DEFAULT_BATCH_SIZE} companies")
-            break
-            
-        if len(organizations) == DEFAULT_BATCH_SIZE:
-            last_uuid = organizations[-1]['uuid']
-            logger.info(f"🔄 Fetching next page after UUID: {last_uuid}")
-            organizations = crawler.get_organizations(after_id=last_uuid, limit=DEFAULT_BATCH_SIZE)
-            page_number += 1
-            time.sleep(random.uniform(DELAY_MIN, DELAY_MAX))
-        else:
-            logger.info("🏁 No more organizations to process")
-            break
-    
-    logger.info(f"🎉 Crawling complete! Total companies processed: {total_processed}")
+    return CrawlScheduler(crawler).run()
 
 def get_next_batch(crawler, last_uuid):
     """Get next batch of organizations"""
@@ -0,0 +1,5 @@
+import os
+
+# settings.py refuses to import without these, the tests never reach the real APIs
+for name in ('CRUNCHBASE_API_KEY', 'OPENAI_API_KEY', 'BASE_CB_API_URL', 'SCRAPEOWL_API_KEY', 'SCRAPEOWL_API_URL'):
+    os.environ.setdefault(name, 'test')
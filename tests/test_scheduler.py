@@ -0,0 +1,192 @@
+import time
+import threading
+from concurrent.futures import Future
+import pytest
+from crunchbase_crawler.core import scheduler
+from crunchbase_crawler.core.crawler import CrunchbaseCrawler
+from crunchbase_crawler.core.scheduler import CrawlBudget, CrawlScheduler, SORT_ORDERS
+
+def entity(uuid, rank=None, updated_at=None):
+    return {'uuid': uuid, 'properties': {'name': uuid, 'rank_org': rank, 'updated_at': updated_at}}
+
+class StubCrawler:
+    """Serves fixed pages and sleeps for the companies listed in `hang`"""
+
+    def __init__(self, pages, hang=()):
+        self.pages = list(pages)
+        self.hang = set(hang)
+        self.orders = []
+        self.companies_data = []
+        self.release = threading.Event()
+
+    def get_organizations(self, after_id=None, limit=None, order=None):
+        self.orders.append(order)
+        return self.pages.pop(0) if self.pages else []
+
+    def build_company_data(self, entity, uuid):
+        return {'uuid': uuid, 'name': entity['properties']['name']}
+
+    def crawl_company(self, entity, uuid, budget=None, deadline=None, low_priority=False):
+        if uuid in self.hang:
+            self.release.wait(5)
+        return dict(self.build_company_data(entity, uuid), website_content='late' if uuid in self.hang else 'ok')
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(scheduler, 'POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(scheduler, 'DELAY_MIN', 0)
+    monkeypatch.setattr(scheduler, 'DELAY_MAX', 0)
+
+def test_low_priority_degrades_before_high_priority():
+    budget = CrawlBudget(max_scrape_calls=10, max_openai_tokens=None, max_seconds=None, low_threshold=0.5)
+    for _ in range(6):
+        assert budget.acquire_scrape(low_priority=True)
+    assert not budget.acquire_scrape(low_priority=True)
+    for _ in range(4):
+        assert budget.acquire_scrape()
+    assert not budget.acquire_scrape()
+    assert budget.scrape_calls == 10
+
+def test_token_reservation_cannot_overshoot_cap():
+    budget = CrawlBudget(max_scrape_calls=None, max_openai_tokens=1000, max_seconds=None)
+    assert budget.reserve_tokens(600)
+    assert not budget.reserve_tokens(600)
+    budget.settle_tokens(600, 300)
+    assert budget.openai_tokens == 300
+    assert budget.reserve_tokens(600)
+
+def test_limiting_budget_names_wall_clock():
+    budget = CrawlBudget(max_scrape_calls=10, max_openai_tokens=None, max_seconds=0)
+    assert not budget.acquire_scrape()
+    assert budget.limiting_budget('scrape') == 'wall-clock time'
+    assert CrawlBudget(max_scrape_calls=0, max_seconds=None).limiting_budget('scrape') == 'ScrapeOwl calls'
+
+def test_priority_by_rank_puts_unranked_last():
+    crawl = CrawlScheduler(StubCrawler([]), strategy='rank_org')
+    entities = [entity('c'), entity('b', rank=20), entity('a', rank=3)]
+    assert [e['uuid'] for e in sorted(entities, key=crawl.priority)] == ['a', 'b', 'c']
+
+def test_priority_by_staleness_puts_oldest_first():
+    crawl = CrawlScheduler(StubCrawler([]), strategy='staleness')
+    entities = [
+        entity('new', rank=1, updated_at='2024-05-01T00:00:00Z'),
+        entity('old', rank=9, updated_at='2020-01-01T00:00:00Z'),
+        entity('never', rank=5),
+    ]
+    assert [e['uuid'] for e in sorted(entities, key=crawl.priority)] == ['never', 'old', 'new']
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        CrawlScheduler(StubCrawler([]), strategy='random')
+
+def test_strategy_order_is_sent_to_api():
+    crawler = StubCrawler([[entity('a', rank=1)]])
+    CrawlScheduler(crawler, strategy='staleness', max_companies=None).run()
+    assert crawler.orders == [SORT_ORDERS['staleness']]
+
+def test_hung_worker_does_not_block_page():
+    crawler = StubCrawler([[entity('slow', rank=1), entity('fast', rank=2)]], hang={'slow'})
+    budget = CrawlBudget(max_scrape_calls=None, max_openai_tokens=None, max_seconds=None)
+    crawl = CrawlScheduler(crawler, budget=budget, max_companies=None, company_timeout=0.2)
+
+    start = time.monotonic()
+    assert crawl.run() == 2
+    assert time.monotonic() - start < 2
+
+    # The timed-out company keeps its Crunchbase data, and its late result is never collected
+    crawler.release.set()
+    time.sleep(0.1)
+    by_uuid = {company['uuid']: company for company in crawler.companies_data}
+    assert set(by_uuid) == {'slow', 'fast'}
+    assert 'website_content' not in by_uuid['slow']
+    assert by_uuid['fast']['website_content'] == 'ok'
+
+def test_expired_deadline_keeps_company_without_website_content(monkeypatch):
+    crawler = CrunchbaseCrawler('.', 'test', 'test')
+    monkeypatch.setattr(crawler, 'scrape_page', lambda *args, **kwargs: pytest.fail('scraped after deadline'))
+    company = {'uuid': 'a', 'properties': {'name': 'A', 'website_url': 'https://a.example'}}
+
+    result = crawler.crawl_company(company, 'a', deadline=time.monotonic() - 1)
+    assert result['name'] == 'A'
+    assert result['website_content'] is None
+    assert crawler.companies_data == []
+
+def test_late_scrape_keeps_crunchbase_data(monkeypatch):
+    crawler = CrunchbaseCrawler('.', 'test', 'test')
+    def slow_scrape(url, timeout):
+        time.sleep(0.2)
+        return 'content'
+    monkeypatch.setattr(crawler, 'scrape_page', slow_scrape)
+    monkeypatch.setattr(crawler, 'analyze_website_with_gpt', lambda *args, **kwargs: 'analysis')
+    company = {'uuid': 'a', 'properties': {'name': 'A', 'website_url': 'https://a.example'}}
+
+    result = crawler.process_company(company, 'a', deadline=time.monotonic() + 0.1)
+    assert result['name'] == 'A'
+    assert result['website_content'] is None
+    assert 'gpt_analysis' not in result
+    assert crawler.companies_data == [result]
+
+def test_pool_full_of_hung_workers_does_not_stall_queued_companies():
+    hung = [entity(f'hung{i}', rank=i) for i in range(scheduler.MAX_WORKERS)]
+    crawler = StubCrawler([hung + [entity('queued', rank=99)]], hang={e['uuid'] for e in hung})
+    budget = CrawlBudget(max_scrape_calls=None, max_openai_tokens=None, max_seconds=None)
+    crawl = CrawlScheduler(crawler, budget=budget, max_companies=None, company_timeout=0.2)
+
+    start = time.monotonic()
+    try:
+        assert crawl.run() == scheduler.MAX_WORKERS + 1
+        assert time.monotonic() - start < 2
+    finally:
+        crawler.release.set()
+
+    assert {company['uuid'] for company in crawler.companies_data} == {e['uuid'] for e in hung} | {'queued'}
+
+def test_wall_clock_abandonment_records_queued_companies():
+    hung = [entity(f'hung{i}', rank=i) for i in range(scheduler.MAX_WORKERS)]
+    crawler = StubCrawler([hung + [entity('queued', rank=99)]], hang={e['uuid'] for e in hung})
+    budget = CrawlBudget(max_scrape_calls=None, max_openai_tokens=None, max_seconds=0.2)
+    crawl = CrawlScheduler(crawler, budget=budget, max_companies=None, company_timeout=60)
+
+    try:
+        assert crawl.run() == scheduler.MAX_WORKERS + 1
+    finally:
+        crawler.release.set()
+
+    assert len(crawler.companies_data) == scheduler.MAX_WORKERS + 1
+    assert {company['uuid'] for company in crawler.companies_data} == {e['uuid'] for e in hung} | {'queued'}
+
+def test_giving_up_on_finished_company_keeps_its_result():
+    crawler = StubCrawler([])
+    crawl = CrawlScheduler(crawler)
+    future = Future()
+    future.set_result({'uuid': 'a', 'name': 'a', 'website_content': 'ok'})
+
+    crawl._give_up(future, entity('a'))
+    assert crawler.companies_data == [{'uuid': 'a', 'name': 'a', 'website_content': 'ok'}]
+
+def test_gpt_requests_are_not_retried(monkeypatch):
+    crawler = CrunchbaseCrawler('.', 'test', 'test')
+    options = []
+
+    class Client:
+        def with_options(self, **kwargs):
+            options.append(kwargs)
+            return self
+
+        @property
+        def chat(self):
+            return self
+
+        @property
+        def completions(self):
+            return self
+
+        def create(self, **kwargs):
+            message = type('Message', (), {'content': 'summary'})
+            choice = type('Choice', (), {'message': message})
+            return type('Response', (), {'choices': [choice], 'usage': None})
+
+    crawler.openai_client = Client()
+    assert crawler.analyze_website_with_gpt('content', deadline=time.monotonic() + 10) == 'summary'
+    assert options[0]['max_retries'] == 0
+    assert options[0]['timeout'] <= 10